@@ -1,26 +1,72 @@
 """
-AI task planning: order tasks for the robot (Gemini/OpenAI or nearest-task-first heuristic).
+AI task planning: order tasks for the robot (Gemini/OpenAI or nearest-task-first + 2-opt heuristic).
 """
 import os
 import re
 from typing import List, Tuple
 
-from utils import manhattan
+import numpy as np
 
+from utils import manhattan_batch
 
-def _nearest_task_first(robot: Tuple[int, int], tasks: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
-    """Order tasks by increasing Manhattan distance from robot (greedy nearest first)."""
+# (r,c) or (x,y) style coordinate pairs in AI output, e.g. (1,2), (3, 4), [1,2], 1,2
+_POS_RE = re.compile(r"\(?\s*(\d+)\s*[,]\s*(\d+)\s*\)?")
+
+
+def _task_distance_matrix(robot: Tuple[int, int], tasks: List[Tuple[int, int]]) -> np.ndarray:
+    """Pairwise Manhattan distances; index 0 is the robot, 1..n are tasks."""
+    pts = np.asarray([robot] + list(tasks), dtype=np.int64)
+    return manhattan_batch(pts, pts)
+
+
+def _greedy_route(dist: np.ndarray) -> List[int]:
+    """Nearest-first route over dist indices, starting at index 0 (the robot)."""
+    # Visited points are knocked out by overwriting their column in a working copy,
+    # so each step is a single argmin with no per-step mask allocation
+    d = dist.copy()
+    visited = np.iinfo(d.dtype).max
+    d[:, 0] = visited
+    current = 0
+    route = [0]
+    for _ in range(len(d) - 1):
+        # argmin picks the first of equally near tasks, same as min() over the list
+        current = int(d[current].argmin())
+        d[:, current] = visited
+        route.append(current)
+    return route
+
+
+def _two_opt(dist: np.ndarray, route: List[int]) -> List[int]:
+    """
+    Shorten an open route (route[0] fixed, no return leg) by reversing segments
+    while any reversal reduces total length.
+    """
+    d = dist.tolist()
+    n = len(route)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 2):
+            for j in range(i + 2, n):
+                a, b, c = route[i], route[i + 1], route[j]
+                if j + 1 < n:
+                    e = route[j + 1]
+                    delta = d[a][c] + d[b][e] - d[a][b] - d[c][e]
+                else:
+                    delta = d[a][c] - d[a][b]
+                if delta < 0:
+                    route[i + 1:j + 1] = route[i + 1:j + 1][::-1]
+                    improved = True
+    return route
+
+
+def _heuristic_task_order(robot: Tuple[int, int], tasks: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Greedy nearest-first order refined with 2-opt."""
     if not tasks:
         return []
-    remaining = list(tasks)
-    current = robot
-    order = []
-    while remaining:
-        nearest = min(remaining, key=lambda t: manhattan(current, t))
-        order.append(nearest)
-        remaining.remove(nearest)
-        current = nearest
-    return order
+    dist = _task_distance_matrix(robot, tasks)
+    route = _two_opt(dist, _greedy_route(dist))
+    return [tasks[i - 1] for i in route[1:]]
 
 
 def _parse_ordered_positions(text: str, task_set: set) -> List[Tuple[int, int]] | None:
@@ -28,17 +74,13 @@ def _parse_ordered_positions(text: str, task_set: set) -> List[Tuple[int, int]]
     Parse AI output for ordered (row,col) or (x,y) positions.
     Looks for patterns like (1,2), (3, 4), [1,2], 1,2 etc.
     """
-    # Normalize: allow (r,c) or (x,y) style
-    pattern = r"\(?\s*(\d+)\s*[,]\s*(\d+)\s*\)?"
-    matches = re.findall(pattern, text)
+    matches = _POS_RE.findall(text)
     if not matches:
         return None
     parsed = [((int(r), int(c)) if (int(r), int(c)) in task_set else None) for r, c in matches]
     parsed = [p for p in parsed if p is not None]
     # Include any tasks we might have missed (different order in text)
-    for t in task_set:
-        if t not in parsed:
-            parsed.append(t)
+    parsed.extend(task_set - set(parsed))
     return parsed if len(parsed) == len(task_set) else None
 
 
@@ -110,15 +152,15 @@ def get_optimal_task_order(
         return list(tasks)
 
     if prefer == "heuristic":
-        return _nearest_task_first(robot, tasks)
+        return _heuristic_task_order(robot, tasks)
 
     if prefer == "openai":
         ordered = order_tasks_openai(robot, tasks)
-        return ordered if ordered is not None else _nearest_task_first(robot, tasks)
+        return ordered if ordered is not None else _heuristic_task_order(robot, tasks)
 
     if prefer == "gemini":
         ordered = order_tasks_gemini(robot, tasks)
-        return ordered if ordered is not None else _nearest_task_first(robot, tasks)
+        return ordered if ordered is not None else _heuristic_task_order(robot, tasks)
 
     # auto
     ordered = order_tasks_gemini(robot, tasks)
@@ -127,4 +169,4 @@ def get_optimal_task_order(
     ordered = order_tasks_openai(robot, tasks)
     if ordered is not None:
         return ordered
-    return _nearest_task_first(robot, tasks)
+    return _heuristic_task_order(robot, tasks)
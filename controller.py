@@ -3,36 +3,39 @@ Controller layer: path validity check and replanning.
 Tracks current path, detects invalid path (blocked by obstacle), triggers replan.
 """
 from __future__ import annotations
-from typing import List, Tuple
+from typing import List, Sequence, Tuple
 import numpy as np
 
 from pathfinding import astar
 from utils import OBSTACLE
 
+# Replans are interactive, so trade optimality for speed with weighted A*
+REPLAN_WEIGHT = 2.0
+
 
 def get_path_cells(
     robot_pos: Tuple[int, int],
-    move_queue: List[Tuple[int, int]],
-) -> List[Tuple[int, int]]:
-    """Return list of (row, col) cells the path visits (robot pos + each step)."""
-    cells = []
-    r, c = robot_pos
-    cells.append((r, c))
-    for dy, dx in move_queue:
-        r, c = r + dy, c + dx
-        cells.append((r, c))
-    return cells
+    move_queue: Sequence[Tuple[int, int]],
+) -> np.ndarray:
+    """
+    Return (N+1, 2) int array of (row, col) cells the path visits (robot pos + each step),
+    as a cumulative sum of the moves.
+    """
+    steps = np.array(move_queue, dtype=np.intp).reshape(-1, 2)
+    return np.cumsum(np.vstack((np.asarray([robot_pos], dtype=np.intp), steps)), axis=0)
 
 
-def is_path_blocked(path_cells: List[Tuple[int, int]], grid: np.ndarray) -> bool:
+def is_path_blocked(path_cells: np.ndarray | List[Tuple[int, int]], grid: np.ndarray) -> bool:
     """
     Return True if any node on the path is now an obstacle (path invalid).
+    Cells are checked with one NumPy gather; out-of-bounds cells are ignored.
     """
-    for (row, col) in path_cells:
-        if 0 <= row < grid.shape[0] and 0 <= col < grid.shape[1]:
-            if grid[row, col] == OBSTACLE:
-                return True
-    return False
+    if len(path_cells) == 0:
+        return False
+    cells = np.asarray(path_cells, dtype=np.intp).reshape(-1, 2)
+    rows, cols = cells[:, 0], cells[:, 1]
+    in_bounds = (rows >= 0) & (rows < grid.shape[0]) & (cols >= 0) & (cols < grid.shape[1])
+    return bool((grid[rows[in_bounds], cols[in_bounds]] == OBSTACLE).any())
 
 
 def replan_path(
@@ -41,6 +44,7 @@ def replan_path(
     grid: np.ndarray,
 ) -> List[Tuple[int, int]]:
     """
-    Replan from robot to goal using A*. Returns new list of (dy, dx) moves.
+    Replan from robot to goal using weighted A* (at most REPLAN_WEIGHT x optimal length).
+    Returns new list of (dy, dx) moves.
     """
-    return astar(grid, robot_pos, goal)
+    return astar(grid, robot_pos, goal, weight=REPLAN_WEIGHT)
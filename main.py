@@ -3,6 +3,8 @@ AI-Powered Robot Simulator – main entry and pygame visualization.
 """
 from __future__ import annotations
 import sys
+import functools
+from collections import deque
 import pygame
 import numpy as np
 
@@ -11,13 +13,14 @@ from utils import (
     OBSTACLE,
     ROBOT,
     TASK,
-    init_simulation,
-    find_robot,
+    init_simulation_state,
     find_tasks,
     place_robot,
     is_walkable,
     DIRECTIONS,
     name_to_direction,
+    obstacle_hash,
+    zobrist_table,
 )
 from pathfinding import astar
 from ai_task import get_optimal_task_order
@@ -46,6 +49,11 @@ def cell_to_rect(row: int, col: int) -> pygame.Rect:
     return pygame.Rect(x, y, CELL_SIZE, CELL_SIZE)
 
 
+def build_rect_grid(rows: int, cols: int) -> list[list[pygame.Rect]]:
+    """Precompute cell_to_rect for every cell; index as rect_grid[row][col]."""
+    return [[cell_to_rect(r, c) for c in range(cols)] for r in range(rows)]
+
+
 def pixel_to_cell(px: int, py: int, grid_rows: int, grid_cols: int) -> tuple[int, int] | None:
     """Convert screen (px, py) to grid (row, col) or None if outside grid."""
     if px < GRID_MARGIN or py < HEADER_H + GRID_MARGIN:
@@ -80,6 +88,23 @@ def _draw_robot(surface: pygame.Surface, rect: pygame.Rect, facing: tuple[int, i
     pygame.draw.polygon(surface, (30, 70, 160), [base1, base2, (tip_x, tip_y)], 1)
 
 
+# Rendered waypoint numbers keyed by (number, done); cleared after each pygame.init()
+_waypoint_label_cache: dict[tuple[int, bool], pygame.Surface] = {}
+_waypoint_fonts: dict[bool, pygame.font.Font] = {}
+
+
+def _waypoint_label(num: int, done: bool) -> pygame.Surface:
+    """Return the rendered label for waypoint num, rendering it on first use."""
+    img = _waypoint_label_cache.get((num, done))
+    if img is None:
+        font = _waypoint_fonts.get(done)
+        if font is None:
+            font = _waypoint_fonts[done] = pygame.font.Font(None, 24 if done else 26)
+        color = (100, 100, 110) if done else (255, 255, 255)
+        img = _waypoint_label_cache[(num, done)] = font.render(str(num), True, color)
+    return img
+
+
 def _waypoint_number(task_order: list, pos: tuple[int, int]) -> int | None:
     """Return 1-based waypoint index for this task position, or None."""
     if pos not in task_order:
@@ -87,53 +112,90 @@ def _waypoint_number(task_order: list, pos: tuple[int, int]) -> int | None:
     return task_order.index(pos) + 1
 
 
+def draw_cell(
+    surface: pygame.Surface,
+    val: int,
+    r: int,
+    c: int,
+    rect: pygame.Rect,
+    completed_tasks: set,
+    path_set: set,
+    task_order: list,
+    robot_facing: tuple[int, int],
+    path_color: tuple[int, int, int],
+) -> None:
+    """Paint a single grid cell holding val (fill, robot/waypoint label, border) into rect."""
+    if val == OBSTACLE:
+        color = COLORS["obstacle"]
+        pygame.draw.rect(surface, color, rect)
+    elif val == ROBOT:
+        pygame.draw.rect(surface, COLORS["empty"], rect)
+        _draw_robot(surface, rect, robot_facing)
+    elif (r, c) in completed_tasks:
+        color = COLORS["task_done"]
+        pygame.draw.rect(surface, color, rect)
+        num = _waypoint_number(task_order, (r, c))
+        if num is not None:
+            img = _waypoint_label(num, True)
+            surface.blit(img, (rect.centerx - img.get_width() // 2, rect.centery - img.get_height() // 2))
+    elif val == TASK:
+        color = COLORS["task"]
+        pygame.draw.rect(surface, color, rect)
+        num = _waypoint_number(task_order, (r, c))
+        if num is not None:
+            img = _waypoint_label(num, False)
+            surface.blit(img, (rect.centerx - img.get_width() // 2, rect.centery - img.get_height() // 2))
+    elif (r, c) in path_set:
+        pygame.draw.rect(surface, path_color, rect)
+    else:
+        color = COLORS["empty"]
+        pygame.draw.rect(surface, color, rect)
+    pygame.draw.rect(surface, (200, 200, 210), rect, 1)
+
+
 def draw_grid(
     surface: pygame.Surface,
     grid: np.ndarray,
     completed_tasks: set,
-    path_cells: list | None = None,
+    path_set: set | None = None,
     task_order: list | None = None,
     robot_pos: tuple[int, int] | None = None,
     robot_facing: tuple[int, int] = (0, 1),
     path_replan_flash: bool = False,
+    cells: set | None = None,
+    rect_grid: list[list[pygame.Rect]] | None = None,
 ) -> None:
-    surface.fill(COLORS["bg"])
-    rows, cols = grid.shape
-    path_set = set(path_cells) if path_cells else set()
+    """Paint the grid. If cells is given, repaint only those (row, col) cells."""
+    path_set = path_set or set()
     task_order = task_order or []
     path_color = (255, 220, 100) if path_replan_flash else (200, 220, 255)
-    for r in range(rows):
-        for c in range(cols):
-            rect = cell_to_rect(r, c)
-            val = grid[r, c]
-            if val == OBSTACLE:
-                color = COLORS["obstacle"]
-                pygame.draw.rect(surface, color, rect)
-            elif val == ROBOT:
-                pygame.draw.rect(surface, COLORS["empty"], rect)
-                _draw_robot(surface, rect, robot_facing)
-            elif (r, c) in completed_tasks:
-                color = COLORS["task_done"]
-                pygame.draw.rect(surface, color, rect)
-                num = _waypoint_number(task_order, (r, c))
-                if num is not None:
-                    font = pygame.font.Font(None, 24)
-                    img = font.render(str(num), True, (100, 100, 110))
-                    surface.blit(img, (rect.centerx - img.get_width() // 2, rect.centery - img.get_height() // 2))
-            elif val == TASK:
-                color = COLORS["task"]
-                pygame.draw.rect(surface, color, rect)
-                num = _waypoint_number(task_order, (r, c))
-                if num is not None:
-                    font = pygame.font.Font(None, 26)
-                    img = font.render(str(num), True, (255, 255, 255))
-                    surface.blit(img, (rect.centerx - img.get_width() // 2, rect.centery - img.get_height() // 2))
-            elif (r, c) in path_set:
-                pygame.draw.rect(surface, path_color, rect)
-            else:
-                color = COLORS["empty"]
-                pygame.draw.rect(surface, color, rect)
-            pygame.draw.rect(surface, (200, 200, 210), rect, 1)
+    rows, cols = grid.shape
+    if rect_grid is None:
+        rect_grid = build_rect_grid(rows, cols)
+    if cells is None:
+        # Full repaint: one tolist() beats a NumPy scalar lookup per cell
+        surface.fill(COLORS["bg"])
+        values = grid.tolist()
+        for r in range(rows):
+            for c in range(cols):
+                draw_cell(surface, values[r][c], r, c, rect_grid[r][c], completed_tasks, path_set, task_order, robot_facing, path_color)
+        return
+    for r, c in cells:
+        draw_cell(surface, grid.item(r, c), r, c, rect_grid[r][c], completed_tasks, path_set, task_order, robot_facing, path_color)
+
+
+def build_header_background(width: int, font: pygame.font.Font) -> pygame.Surface:
+    """Render the static header (background, separator, controls hint) once."""
+    # One row taller than the header: the 2px separator spills into the row below it
+    header_bg = pygame.Surface((width, HEADER_H + 1))
+    header_bg.fill((255, 255, 255))
+    pygame.draw.line(header_bg, (220, 220, 230), (0, HEADER_H - 1), (width, HEADER_H - 1), 2)
+    # Controls hint (two short lines to avoid cramping)
+    ctrl1 = font.render("Space=Run  S=Step  1/2/3=Speed  R=Reset  Q=Quit", True, COLORS["text_secondary"])
+    ctrl2 = font.render("Click empty = add obstacle   Click obstacle = remove   Drag = move obstacle", True, COLORS["text_secondary"])
+    header_bg.blit(ctrl1, (16, 54))
+    header_bg.blit(ctrl2, (16, 68))
+    return header_bg
 
 
 def draw_header(
@@ -145,10 +207,11 @@ def draw_header(
     speed_label: str,
     status_msg: str,
     font: pygame.font.Font,
+    header_bg: pygame.Surface | None = None,
 ) -> None:
-    header = pygame.Rect(0, 0, surface.get_width(), HEADER_H)
-    pygame.draw.rect(surface, (255, 255, 255), header)
-    pygame.draw.line(surface, (220, 220, 230), (0, HEADER_H - 1), (surface.get_width(), HEADER_H - 1), 2)
+    if header_bg is None:
+        header_bg = build_header_background(surface.get_width(), font)
+    surface.blit(header_bg, (0, 0))
     y_center = 22
     labels = [
         ("Steps:", f"{steps}"),
@@ -170,11 +233,6 @@ def draw_header(
     status_color = (40, 120, 60) if "complete" in status_msg.lower() else COLORS["text_secondary"]
     status_img = font.render(status_msg, True, status_color)
     surface.blit(status_img, (16, 38))
-    # Controls hint (two short lines to avoid cramping)
-    ctrl1 = font.render("Space=Run  S=Step  1/2/3=Speed  R=Reset  Q=Quit", True, COLORS["text_secondary"])
-    ctrl2 = font.render("Click empty = add obstacle   Click obstacle = remove   Drag = move obstacle", True, COLORS["text_secondary"])
-    surface.blit(ctrl1, (16, 54))
-    surface.blit(ctrl2, (16, 68))
 
 
 def draw_restart_button(
@@ -206,20 +264,30 @@ def run_simulation(
     seed: int | None = None,
     ai_prefer: str = "auto",
 ) -> None:
-    grid, robot_pos, task_positions = init_simulation(
+    state, task_positions = init_simulation_state(
         rows=grid_rows,
         cols=grid_cols,
         num_tasks=num_tasks,
         num_obstacles=num_obstacles,
         seed=seed,
     )
+    grid, robot_pos = state.grid, state.robot_pos
     completed_tasks = set()
     steps = 0
     # Plan task order once at start
     task_order = get_optimal_task_order(robot_pos, task_positions, prefer=ai_prefer)
     # Build full move queue: for each task, A* path then pop task when reached
-    move_queue = []
+    move_queue = deque()
     current_goal_index = 0
+    # A* results are memoized per obstacle layout; grid_hash is updated on every edit
+    zobrist = zobrist_table(grid_rows, grid_cols)
+    grid_hash = obstacle_hash(grid, zobrist)
+
+    @functools.lru_cache(maxsize=64)
+    def plan(start: tuple[int, int], goal: tuple[int, int], layout: int, replan: bool = False) -> tuple:
+        """Moves from start to goal on the current grid; layout is its obstacle hash (cache key)."""
+        moves = replan_path(start, goal, grid) if replan else astar(grid, start, goal)
+        return tuple(moves)
 
     def refill_moves() -> bool:
         nonlocal current_goal_index, move_queue
@@ -228,20 +296,19 @@ def run_simulation(
             if goal in completed_tasks:
                 current_goal_index += 1
                 continue
-            rp = find_robot(grid)
-            if rp is None:
-                return False
-            path = astar(grid, rp, goal)
+            path = plan(robot_pos, goal, grid_hash)
             if not path:
                 current_goal_index += 1
                 continue
-            move_queue = path
+            move_queue = deque(path)
             return True
         return False
 
     refill_moves()
 
     pygame.init()
+    _waypoint_label_cache.clear()
+    _waypoint_fonts.clear()
     font = pygame.font.Font(None, 28)
     width = grid_cols * (CELL_SIZE + GRID_MARGIN) + GRID_MARGIN * 2
     height = HEADER_H + grid_rows * (CELL_SIZE + GRID_MARGIN) + GRID_MARGIN * 2
@@ -249,6 +316,9 @@ def run_simulation(
     pygame.display.set_caption("AI Robot Simulator")
     clock = pygame.time.Clock()
     restart_btn_rect = pygame.Rect(width - 92, 14, 76, 26)
+    header_rect = pygame.Rect(0, 0, width, HEADER_H)
+    header_bg = build_header_background(width, font)
+    rect_grid = build_rect_grid(grid_rows, grid_cols)
 
     auto_advance = False
     step_once = False
@@ -260,6 +330,15 @@ def run_simulation(
     # Mouse: obstacle edit
     mouse_down_cell = None
     mouse_down_was_obstacle = False
+    grid_dirty = False  # obstacles edited since the path was last checked
+    # Dirty-cell redraw: only cells that changed since the last paint are repainted
+    full_redraw = True
+    dirty_cells = set()
+    prev_path_set = set()
+    prev_robot_pos = robot_pos
+    prev_robot_facing = robot_facing
+    prev_completed = set()
+    prev_replan_flash = False
 
     while True:
         for event in pygame.event.get():
@@ -290,13 +369,21 @@ def run_simulation(
                             # Toggle: empty <-> obstacle (do not put obstacle on robot/task)
                             if grid[cell[0], cell[1]] == OBSTACLE:
                                 grid[cell[0], cell[1]] = EMPTY
+                                grid_hash ^= int(zobrist[cell])
+                                grid_dirty = True
                             elif grid[cell[0], cell[1]] == EMPTY:
                                 grid[cell[0], cell[1]] = OBSTACLE
+                                grid_hash ^= int(zobrist[cell])
+                                grid_dirty = True
+                            dirty_cells.add(cell)
                         else:
                             # Drag: move obstacle from mouse_down_cell to cell
                             if mouse_down_was_obstacle and grid[cell[0], cell[1]] == EMPTY:
                                 grid[mouse_down_cell[0], mouse_down_cell[1]] = EMPTY
                                 grid[cell[0], cell[1]] = OBSTACLE
+                                grid_hash ^= int(zobrist[mouse_down_cell]) ^ int(zobrist[cell])
+                                grid_dirty = True
+                                dirty_cells.update((mouse_down_cell, cell))
                     mouse_down_cell = None
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_q:
@@ -328,41 +415,36 @@ def run_simulation(
         if step_once:
             step_once = False
 
-        # Path validity: before moving, check if current path is blocked; replan if so
-        rp = find_robot(grid)
-        path_cells = get_path_cells(rp, move_queue) if (rp is not None and move_queue) else []
-        if do_one_step and move_queue and rp is not None:
-            if is_path_blocked(path_cells, grid):
+        # Path validity: only an obstacle edit can block the current path, so check
+        # (and replan if blocked) before the first move after an edit
+        if do_one_step and move_queue and grid_dirty:
+            if is_path_blocked(get_path_cells(robot_pos, move_queue), grid):
                 goal = task_order[current_goal_index] if current_goal_index < len(task_order) else None
                 if goal is not None and goal not in completed_tasks:
-                    new_path = replan_path(rp, goal, grid)
-                    move_queue = new_path
+                    new_path = plan(robot_pos, goal, grid_hash, replan=True)
+                    move_queue = deque(new_path)
                     replan_flash_until = time.time() + 0.5
                     if not move_queue:
                         refill_moves()
-                path_cells = get_path_cells(rp, move_queue) if move_queue else []
+            grid_dirty = False
 
         if do_one_step and move_queue:
-            dy, dx = move_queue.pop(0)
+            dy, dx = move_queue.popleft()
             robot_facing = (dy, dx)
-            rp = find_robot(grid)
-            if rp is not None:
-                r, c = rp
-                nr, nc = r + dy, c + dx
-                if is_walkable(grid, nr, nc, ignore_robot=True):
-                    grid[r, c] = EMPTY
-                    if grid[nr, nc] == TASK:
-                        completed_tasks.add((nr, nc))
-                        grid[nr, nc] = EMPTY
-                    place_robot(grid, nr, nc)
-                    steps += 1
+            r, c = robot_pos
+            nr, nc = r + dy, c + dx
+            if is_walkable(grid, nr, nc, ignore_robot=True):
+                if grid.item(nr, nc) == TASK:
+                    completed_tasks.add((nr, nc))
+                place_robot(state, nr, nc)
+                robot_pos = state.robot_pos
+                steps += 1
             if not move_queue:
                 refill_moves()
         frame_count += 1
 
         # Path preview cells for drawing (current state after move)
-        rp = find_robot(grid)
-        path_cells = get_path_cells(rp, move_queue) if (rp is not None and move_queue) else []
+        path_set = set(map(tuple, get_path_cells(robot_pos, move_queue).tolist())) if move_queue else set()
 
         current_goal = current_goal_index + 1 if current_goal_index < len(task_order) else len(task_positions)
         path_replan_flash = time.time() < replan_flash_until
@@ -375,16 +457,23 @@ def run_simulation(
             status_msg = f"Navigating to waypoint {current_goal}..."
         else:
             status_msg = "Idle."
-        rp = find_robot(grid)
+        dirty_cells |= prev_path_set ^ path_set
+        dirty_cells |= completed_tasks - prev_completed
+        if robot_pos != prev_robot_pos or robot_facing != prev_robot_facing:
+            dirty_cells |= {prev_robot_pos, robot_pos}
+        if path_replan_flash != prev_replan_flash:
+            dirty_cells |= path_set
         draw_grid(
             screen,
             grid,
             completed_tasks,
-            path_cells=path_cells,
+            path_set=path_set,
             task_order=task_order,
-            robot_pos=rp,
+            robot_pos=robot_pos,
             robot_facing=robot_facing,
             path_replan_flash=path_replan_flash,
+            cells=None if full_redraw else dirty_cells,
+            rect_grid=rect_grid,
         )
         draw_header(
             screen,
@@ -395,10 +484,21 @@ def run_simulation(
             speed_labels.get(frame_delay, "2-Med"),
             status_msg,
             font,
+            header_bg=header_bg,
         )
         mission_complete = len(completed_tasks) >= len(task_positions) and len(task_positions) > 0
         draw_restart_button(screen, restart_btn_rect, font, highlight=mission_complete)
-        pygame.display.flip()
+        if full_redraw:
+            pygame.display.flip()
+            full_redraw = False
+        else:
+            pygame.display.update([rect_grid[r][c] for r, c in dirty_cells] + [header_rect])
+        dirty_cells = set()
+        prev_path_set = path_set
+        prev_robot_pos = robot_pos
+        prev_robot_facing = robot_facing
+        prev_completed = set(completed_tasks)
+        prev_replan_flash = path_replan_flash
         clock.tick(40)
 
 
@@ -7,11 +7,18 @@ import heapq
 from typing import List, Tuple
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; astar falls back to the pure-Python search
+    njit = None
+
 from utils import (
     DIRECTIONS,
+    GRID_DTYPE,
+    create_padded_grid,
     direction_to_name,
     is_valid_cell,
-    manhattan,
+    manhattan_table,
     OBSTACLE,
     ROBOT,
     TASK,
@@ -23,7 +30,7 @@ def _walkable(grid: np.ndarray, row: int, col: int, start: Tuple[int, int]) -> b
     """Cell is walkable if empty, task, or is the start (robot) cell."""
     if not is_valid_cell(grid, row, col):
         return False
-    v = grid[row, col]
+    v = grid.item(row, col)
     if v == OBSTACLE:
         return False
     if (row, col) == start:
@@ -31,43 +38,189 @@ def _walkable(grid: np.ndarray, row: int, col: int, start: Tuple[int, int]) -> b
     return v in (EMPTY, TASK, ROBOT)
 
 
+def _reconstruct_moves(
+    parent: List[int],
+    move: List[Tuple[int, int]],
+    start: int,
+    goal: int,
+) -> List[Tuple[int, int]]:
+    """Walk parent pointers back from goal to start and return the (dy, dx) moves in order."""
+    moves = []
+    node = goal
+    while node != start:
+        moves.append(move[node])
+        node = parent[node]
+    moves.reverse()
+    return moves
+
+
+def _astar_py(
+    grid: np.ndarray,
+    start: Tuple[int, int],
+    goal: Tuple[int, int],
+    weight: float = 1.0,
+) -> List[Tuple[int, int]]:
+    """Pure-Python A* search; start != goal and goal is walkable."""
+    rows, cols = grid.shape
+    width = cols + 2
+    # One-cell OBSTACLE border: neighbours of an interior cell never need a bounds check.
+    # Cells are flat indices r * width + c into the padded grid.
+    padded = create_padded_grid(rows, cols)
+    padded[1:-1, 1:-1] = grid
+    open_cells = (padded != OBSTACLE).ravel().tolist()
+    steps = tuple((dy * width + dx, (dy, dx)) for dy, dx in DIRECTIONS)
+    n = len(open_cells)
+    start_v = (start[0] + 1) * width + start[1] + 1
+    goal_v = (goal[0] + 1) * width + goal[1] + 1
+    # Heuristic for every cell computed once, so each relaxation is a single list lookup
+    h = manhattan_table(padded.shape, (goal[0] + 1, goal[1] + 1)).ravel().tolist()
+    g_score = [n] * n  # n exceeds any path length
+    g_score[start_v] = 0
+    parent = [-1] * n
+    move = [None] * n
+
+    # priority, counter, cell, g; paths are rebuilt from parent/move at the goal
+    counter = 0
+    open_set = [(weight * h[start_v], counter, start_v, 0)]
+    while open_set:
+        _, _, v, g = heapq.heappop(open_set)
+        if g > g_score[v]:
+            continue  # stale entry, a cheaper route was found after this push
+        if v == goal_v:
+            return _reconstruct_moves(parent, move, start_v, goal_v)
+        g += 1
+        for offset, step in steps:
+            nv = v + offset
+            if not open_cells[nv] or g >= g_score[nv]:
+                continue
+            g_score[nv] = g
+            parent[nv] = v
+            move[nv] = step
+            counter += 1
+            heapq.heappush(open_set, (g + weight * h[nv], counter, nv, g))
+    return []
+
+
+if njit is not None:
+    from utils_numba import get_neighbors_nb, manhattan_nb
+
+    @njit(cache=True)
+    def _heap_less(hf, hk, i, j):
+        return hf[i] < hf[j] or (hf[i] == hf[j] and hk[i] < hk[j])
+
+    @njit(cache=True)
+    def _heap_swap(hf, hk, hv, i, j):
+        hf[i], hf[j] = hf[j], hf[i]
+        hk[i], hk[j] = hk[j], hk[i]
+        hv[i], hv[j] = hv[j], hv[i]
+
+    @njit(cache=True)
+    def _heap_push(hf, hk, hv, size, f, k, v):
+        hf[size], hk[size], hv[size] = f, k, v
+        i = size
+        while i > 0:
+            parent = (i - 1) // 2
+            if not _heap_less(hf, hk, i, parent):
+                break
+            _heap_swap(hf, hk, hv, i, parent)
+            i = parent
+        return size + 1
+
+    @njit(cache=True)
+    def _heap_pop(hf, hk, hv, size):
+        size -= 1
+        _heap_swap(hf, hk, hv, 0, size)
+        i = 0
+        while True:
+            smallest = i
+            left, right = 2 * i + 1, 2 * i + 2
+            if left < size and _heap_less(hf, hk, left, smallest):
+                smallest = left
+            if right < size and _heap_less(hf, hk, right, smallest):
+                smallest = right
+            if smallest == i:
+                break
+            _heap_swap(hf, hk, hv, i, smallest)
+            i = smallest
+        return size
+
+    @njit(cache=True)
+    def _astar_nb(grid, sr, sc, gr, gc, weight):
+        """
+        A* over a flat index r * cols + c, same expansion and tie-break order as _astar_py.
+        Returns an (N, 2) array of (dy, dx) moves (empty if no path).
+        """
+        rows, cols = grid.shape
+        n = rows * cols
+        g_score = np.full(n, n + 1, dtype=np.int32)  # n + 1 exceeds any path length
+        parent = np.full(n, -1, dtype=np.int32)
+        neighbors = np.empty((4, 2), dtype=np.int32)
+        # Each node is pushed at most once per improving edge, so 4 * n bounds the heap
+        hf = np.empty(4 * n + 1, dtype=np.float64)
+        hk = np.empty(4 * n + 1, dtype=np.int64)
+        hv = np.empty(4 * n + 1, dtype=np.int32)
+        start = sr * cols + sc
+        goal = gr * cols + gc
+        g_score[start] = 0
+        size = _heap_push(hf, hk, hv, 0, weight * manhattan_nb(sr, sc, gr, gc), 0, start)
+        counter = 0
+        while size > 0:
+            f, v = hf[0], hv[0]
+            size = _heap_pop(hf, hk, hv, size)
+            r, c = v // cols, v % cols
+            g = g_score[v]
+            if f > g + weight * manhattan_nb(r, c, gr, gc):
+                continue
+            if v == goal:
+                length = 0
+                node = goal
+                while node != start:
+                    length += 1
+                    node = parent[node]
+                out = np.empty((length, 2), dtype=np.int32)
+                node = goal
+                for i in range(length - 1, -1, -1):
+                    prev = parent[node]
+                    out[i, 0] = node // cols - prev // cols
+                    out[i, 1] = node % cols - prev % cols
+                    node = prev
+                return out
+            for k in range(get_neighbors_nb(grid, r, c, neighbors)):
+                nr, nc = neighbors[k, 0], neighbors[k, 1]
+                nv = nr * cols + nc
+                new_g = g + 1
+                if new_g >= g_score[nv]:
+                    continue
+                g_score[nv] = new_g
+                parent[nv] = v
+                counter += 1
+                size = _heap_push(hf, hk, hv, size, new_g + weight * manhattan_nb(nr, nc, gr, gc), counter, nv)
+        return np.empty((0, 2), dtype=np.int32)
+else:
+    _astar_nb = None
+
+
 def astar(
     grid: np.ndarray,
     start: Tuple[int, int],
     goal: Tuple[int, int],
+    weight: float = 1.0,
 ) -> List[Tuple[int, int]]:
     """
     A* from start to goal on grid.
     Returns list of (dy, dx) moves, e.g. [(-1,0), (0,1)] for UP then RIGHT.
+    weight > 1 runs weighted A* (f = g + weight * h): fewer expansions, path at most
+    weight times the optimal length.
+    Uses the Numba-compiled search when numba is installed.
     """
     if start == goal:
         return []
     if not _walkable(grid, goal[0], goal[1], start):
         return []
-
-    # priority, counter, (row, col), path_so_far
-    counter = 0
-    open_set = [(manhattan(start, goal), counter, start, [])]
-    heapq.heapify(open_set)
-    seen = {start}
-
-    while open_set:
-        _, _, (r, c), path = heapq.heappop(open_set)
-        if (r, c) == goal:
-            return path
-        for dy, dx in DIRECTIONS:
-            nr, nc = r + dy, c + dx
-            if (nr, nc) in seen:
-                continue
-            if not _walkable(grid, nr, nc, start):
-                continue
-            seen.add((nr, nc))
-            new_path = path + [(dy, dx)]
-            g = len(new_path)
-            h = manhattan((nr, nc), goal)
-            heapq.heappush(open_set, (g + h, counter, (nr, nc), new_path))
-            counter += 1
-    return []
+    if _astar_nb is None:
+        return _astar_py(grid, start, goal, weight)
+    moves = _astar_nb(np.ascontiguousarray(grid, dtype=GRID_DTYPE), start[0], start[1], goal[0], goal[1], float(weight))
+    return [(dy, dx) for dy, dx in moves.tolist()]
 
 
 def astar_moves_as_names(grid: np.ndarray, start: Tuple[int, int], goal: Tuple[int, int]) -> List[str]:
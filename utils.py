@@ -2,15 +2,17 @@
 Grid environment utilities for the robot simulator.
 Cell types: 0=empty, 1=obstacle, 2=robot, 3=task
 """
+from dataclasses import dataclass, field
 import numpy as np
-import random
-from typing import List, Tuple
+from typing import Any, Iterable, List, Set, Tuple
 
 # Cell type constants
 EMPTY = 0
 OBSTACLE = 1
 ROBOT = 2
 TASK = 3
+# Storage type for grids: every cell type fits in a byte
+GRID_DTYPE = np.uint8
 
 # Movement directions: (dy, dx) for row, col
 UP = (-1, 0)
@@ -20,61 +22,165 @@ RIGHT = (0, 1)
 DIRECTIONS = [UP, DOWN, LEFT, RIGHT]
 DIRECTION_NAMES = ["UP", "DOWN", "LEFT", "RIGHT"]
 
+# Compiled grid helpers, if utils_native.pyx has been built (cythonize -i utils_native.pyx).
+# They only accept C-contiguous GRID_DTYPE grids; is_walkable / get_neighbors check before using them.
+try:
+    import utils_native as _native
+except ImportError:
+    _native = None
+
+# Shared random generator for scenario generation; reseed with seed_rng()
+_rng = np.random.default_rng()
+
+
+_DIR2NAME = dict(zip(DIRECTIONS, DIRECTION_NAMES))
+_NAME2DIR = {name: d for d, name in _DIR2NAME.items()}
+
 
 def direction_to_name(dy: int, dx: int) -> str:
     """Convert (dy, dx) to name."""
-    for (ddy, ddx), name in zip(DIRECTIONS, DIRECTION_NAMES):
-        if (dy, dx) == (ddy, ddx):
-            return name
-    return "UNKNOWN"
+    return _DIR2NAME.get((dy, dx), "UNKNOWN")
 
 
 def name_to_direction(name: str) -> Tuple[int, int]:
     """Convert name to (dy, dx)."""
-    name = name.strip().upper()
-    for n, (dy, dx) in zip(DIRECTION_NAMES, DIRECTIONS):
-        if n == name:
-            return (dy, dx)
-    return (0, 0)
+    return _NAME2DIR.get(name.strip().upper(), (0, 0))
+
+
+def seed_rng(seed: int | None) -> None:
+    """Replace the module random generator with a fresh one seeded with seed."""
+    global _rng
+    _rng = np.random.default_rng(seed)
 
 
 def create_grid(rows: int, cols: int) -> np.ndarray:
     """Create an empty grid (all EMPTY)."""
-    return np.zeros((rows, cols), dtype=np.int32)
+    return np.zeros((rows, cols), dtype=GRID_DTYPE)
+
+
+def create_padded_grid(rows: int, cols: int) -> np.ndarray:
+    """
+    Create a (rows + 2, cols + 2) grid with an OBSTACLE border and EMPTY interior.
+    Interior cell (r, c) lives at (r + 1, c + 1); border cells make bounds checks unnecessary.
+    """
+    grid = np.full((rows + 2, cols + 2), OBSTACLE, dtype=GRID_DTYPE)
+    grid[1:-1, 1:-1] = EMPTY
+    return grid
+
+
+def cell_mask(shape: Tuple[int, int], cells: Iterable[Tuple[int, int]]) -> np.ndarray:
+    """Boolean grid mask that is True at each (row, col) in cells."""
+    mask = np.zeros(shape, dtype=bool)
+    idx = np.asarray(list(cells), dtype=np.intp).reshape(-1, 2)
+    mask[idx[:, 0], idx[:, 1]] = True
+    return mask
 
 
-def add_obstacles(grid: np.ndarray, count: int, exclude: List[Tuple[int, int]]) -> None:
+def add_obstacles(
+    grid: np.ndarray,
+    count: int,
+    exclude: Iterable[Tuple[int, int]],
+    rng: np.random.Generator | None = None,
+) -> None:
     """Add random obstacles; exclude given (row, col) positions."""
-    rows, cols = grid.shape
-    cells = [(r, c) for r in range(rows) for c in range(cols) if (r, c) not in exclude]
-    if count >= len(cells):
-        count = max(0, len(cells) - 1)
-    for (r, c) in random.sample(cells, count):
-        grid[r, c] = OBSTACLE
+    excluded = cell_mask(grid.shape, exclude)
+    _place_obstacles(grid, count, np.flatnonzero(~excluded), rng)
+
+
+def _place_obstacles(
+    grid: np.ndarray,
+    count: int,
+    free: np.ndarray,
+    rng: np.random.Generator | None = None,
+) -> None:
+    """Turn count random cells from free (flat indices) into obstacles, leaving at least one free."""
+    if count >= len(free):
+        count = max(0, len(free) - 1)
+    if rng is None:
+        rng = _rng
+    # shuffle=False: order of the picks is irrelevant, so skip the final shuffle of the sample
+    grid.flat[rng.choice(free, size=count, replace=False, shuffle=False)] = OBSTACLE
+
 
+@dataclass
+class SimState:
+    """Grid plus sidecar robot/task positions, kept in sync by place_robot / place_task."""
+    grid: np.ndarray
+    robot_pos: Tuple[int, int] | None = None
+    tasks: Set[Tuple[int, int]] = field(default_factory=set)
+    # Lazily built spatial index over tasks (see nearest_task); reset whenever tasks change
+    _task_tree: Any = field(default=None, init=False, repr=False, compare=False)
 
-def place_robot(grid: np.ndarray, row: int, col: int) -> None:
-    """Set cell to robot (call after clearing previous robot cell if moving)."""
-    grid[row, col] = ROBOT
 
+def place_robot(state: SimState, row: int, col: int) -> None:
+    """Move the robot to (row, col): clear its previous cell, set the new one, update state."""
+    if state.robot_pos is not None:
+        state.grid[state.robot_pos] = EMPTY
+    state.grid[row, col] = ROBOT
+    state.robot_pos = (row, col)
+    if (row, col) in state.tasks:
+        state.tasks.discard((row, col))
+        state._task_tree = None
 
-def place_task(grid: np.ndarray, row: int, col: int) -> None:
+
+def place_task(state: SimState, row: int, col: int) -> None:
     """Set cell to task."""
-    grid[row, col] = TASK
+    state.grid[row, col] = TASK
+    state.tasks.add((row, col))
+    state._task_tree = None
 
 
-def find_robot(grid: np.ndarray) -> Tuple[int, int] | None:
+def find_robot(state: SimState) -> Tuple[int, int] | None:
     """Return (row, col) of robot or None."""
-    ys, xs = np.where(grid == ROBOT)
-    if len(ys) == 0:
-        return None
-    return (int(ys[0]), int(xs[0]))
+    return state.robot_pos
 
 
-def find_tasks(grid: np.ndarray) -> List[Tuple[int, int]]:
+def find_tasks(state: SimState) -> List[Tuple[int, int]]:
     """Return list of (row, col) for all task cells."""
-    ys, xs = np.where(grid == TASK)
-    return list(zip(ys.tolist(), xs.tolist()))
+    return list(state.tasks)
+
+
+# Above this many tasks nearest_task uses a KD-tree (if scipy is installed)
+_KDTREE_MIN_TASKS = 32
+
+
+def nearest_task(state: SimState, pos: Tuple[int, int]) -> Tuple[int, int] | None:
+    """Return the task closest to pos by Manhattan distance, or None if there are no tasks."""
+    if not state.tasks:
+        return None
+    if len(state.tasks) > _KDTREE_MIN_TASKS:
+        if state._task_tree is None:
+            try:
+                from scipy.spatial import cKDTree
+                tasks = list(state.tasks)
+                state._task_tree = (cKDTree(tasks), tasks)
+            except ImportError:
+                state._task_tree = False  # scipy missing; don't retry until tasks change
+        if state._task_tree:
+            tree, tasks = state._task_tree
+            _, i = tree.query(pos, k=1, p=1)  # p=1: Manhattan (cityblock) metric
+            return tasks[int(i)]
+    tasks = list(state.tasks)
+    return tasks[int(manhattan_batch(np.asarray(pos), np.asarray(tasks))[0].argmin())]
+
+
+def _legacy_find_robot(grid: np.ndarray) -> Tuple[int, int] | None:
+    """Scan grid for the robot; return (row, col) or None."""
+    is_robot = grid.ravel() == ROBOT
+    idx = int(is_robot.argmax())  # first match in row-major order, 0 if none
+    if not is_robot[idx]:
+        return None
+    return divmod(idx, grid.shape[1])
+
+
+def find_tasks_arr(grid: np.ndarray) -> np.ndarray:
+    """Scan grid for task cells; return an (N, 2) int32 array of (row, col) rows."""
+    return np.argwhere(grid == TASK).astype(np.int32, copy=False)
+
+
+def _legacy_find_tasks(grid: np.ndarray) -> List[Tuple[int, int]]:
+    """Scan grid for task cells; return list of (row, col)."""
+    return [tuple(rc) for rc in find_tasks_arr(grid).tolist()]
 
 
 def is_valid_cell(grid: np.ndarray, row: int, col: int) -> bool:
@@ -85,9 +191,11 @@ def is_valid_cell(grid: np.ndarray, row: int, col: int) -> bool:
 
 def is_walkable(grid: np.ndarray, row: int, col: int, ignore_robot: bool = False) -> bool:
     """True if cell can be moved into (empty, task, or robot if ignore_robot)."""
+    if _native is not None and grid.dtype == GRID_DTYPE and grid.flags.c_contiguous:
+        return _native.is_walkable(grid, row, col, ignore_robot)
     if not is_valid_cell(grid, row, col):
         return False
-    v = grid[row, col]
+    v = grid.item(row, col)
     if v == OBSTACLE:
         return False
     if v == ROBOT and not ignore_robot:
@@ -97,47 +205,113 @@ def is_walkable(grid: np.ndarray, row: int, col: int, ignore_robot: bool = False
 
 def get_neighbors(grid: np.ndarray, row: int, col: int, walkable_only: bool = True) -> List[Tuple[int, int]]:
     """Return neighboring (row, col) cells. If walkable_only, exclude obstacles."""
+    if _native is not None and grid.dtype == GRID_DTYPE and grid.flags.c_contiguous:
+        return _native.get_neighbors(grid, row, col, walkable_only)
+    rows, cols = grid.shape
     out = []
     for dy, dx in DIRECTIONS:
         r, c = row + dy, col + dx
-        if not is_valid_cell(grid, r, c):
+        # Bounds check inlined (no is_valid_cell call per neighbour)
+        if not (0 <= r < rows and 0 <= c < cols):
             continue
-        if walkable_only and grid[r, c] == OBSTACLE:
+        if walkable_only and grid.item(r, c) == OBSTACLE:
             continue
         out.append((r, c))
     return out
 
 
+def zobrist_table(rows: int, cols: int, seed: int | None = None) -> np.ndarray:
+    """Random 63-bit key per cell for incremental (Zobrist) hashing of obstacle layouts."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(1, 2**63, size=(rows, cols), dtype=np.int64)
+
+
+def obstacle_hash(grid: np.ndarray, table: np.ndarray) -> int:
+    """XOR of table keys over obstacle cells; toggling (r, c) is hash ^ table[r, c]."""
+    return int(np.bitwise_xor.reduce(table[grid == OBSTACLE]))
+
+
+def get_neighbors_padded(grid: np.ndarray, row: int, col: int) -> List[Tuple[int, int]]:
+    """Walkable neighbours of interior cell (row, col) of a padded grid; no bounds checks needed."""
+    out = []
+    for dy, dx in DIRECTIONS:
+        r, c = row + dy, col + dx
+        if grid.item(r, c) != OBSTACLE:
+            out.append((r, c))
+    return out
+
+
 def manhattan(a: Tuple[int, int], b: Tuple[int, int]) -> int:
     """Manhattan distance between (r1,c1) and (r2,c2)."""
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
 
-def init_simulation(
+def manhattan_batch(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N, M) Manhattan distances between every (row, col) in a (N, 2) and in b (M, 2)."""
+    a = np.asarray(a).reshape(-1, 2)
+    b = np.asarray(b).reshape(-1, 2)
+    return np.abs(a[:, None, 0] - b[None, :, 0]) + np.abs(a[:, None, 1] - b[None, :, 1])
+
+
+def manhattan_table(shape: Tuple[int, int], goal: Tuple[int, int]) -> np.ndarray:
+    """Manhattan distance from every cell of a grid with this shape to goal, as a 2D array."""
+    rows, cols = shape
+    return np.abs(np.arange(rows) - goal[0])[:, None] + np.abs(np.arange(cols) - goal[1])[None, :]
+
+
+def init_simulation_state(
     rows: int = 12,
     cols: int = 16,
     num_tasks: int = 3,
     num_obstacles: int = 15,
     seed: int | None = None,
-) -> Tuple[np.ndarray, Tuple[int, int], List[Tuple[int, int]]]:
+    rng: np.random.Generator | None = None,
+) -> Tuple[SimState, List[Tuple[int, int]]]:
     """
-    Create grid with robot at start, tasks, and obstacles.
-    Returns (grid, robot_pos, task_positions).
+    Create a SimState with robot at start, tasks, and obstacles.
+    Randomness comes from rng (default: the module generator). seed is kept for
+    compatibility and builds a private Generator without touching the module one.
+    Returns (state, task_positions), tasks in placement order.
     """
     if seed is not None:
-        random.seed(seed)
-    grid = create_grid(rows, cols)
-    robot_pos = (0, 0)
-    place_robot(grid, *robot_pos)
-    exclude = [robot_pos]
+        rng = np.random.default_rng(seed)
+    elif rng is None:
+        rng = _rng
+    state = SimState(create_grid(rows, cols))
+    grid = state.grid
+    place_robot(state, 0, 0)
+    # Flat indices of empty cells; a placed task is swapped with the last entry and dropped
+    free = np.flatnonzero(grid.ravel() == EMPTY)
     task_positions = []
     for _ in range(num_tasks):
-        cells = [(r, c) for r in range(rows) for c in range(cols) if (r, c) not in exclude and grid[r, c] == EMPTY]
-        if not cells:
+        if free.size == 0:
             break
-        r, c = random.choice(cells)
-        place_task(grid, r, c)
+        i = rng.integers(free.size)
+        r, c = divmod(int(free[i]), cols)
+        place_task(state, r, c)
         task_positions.append((r, c))
-        exclude.append((r, c))
-    add_obstacles(grid, num_obstacles, exclude)
-    return grid, robot_pos, task_positions
+        free[i] = free[-1]
+        free = free[:-1]
+    _place_obstacles(grid, num_obstacles, free, rng)
+    return state, task_positions
+
+
+def init_simulation(
+    rows: int = 12,
+    cols: int = 16,
+    num_tasks: int = 3,
+    num_obstacles: int = 15,
+    seed: int | None = None,
+    rng: np.random.Generator | None = None,
+) -> Tuple[np.ndarray, Tuple[int, int], List[Tuple[int, int]]]:
+    """
+    Create grid with robot at start, tasks, and obstacles (see init_simulation_state).
+    Returns (grid, robot_pos, task_positions).
+    """
+    state, task_positions = init_simulation_state(rows, cols, num_tasks, num_obstacles, seed, rng)
+    return state.grid, state.robot_pos, task_positions
+
+
+# Compiled manhattan, if utils_native.pyx has been built (see _native above)
+if _native is not None:
+    manhattan = _native.manhattan  # noqa: F811
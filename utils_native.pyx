@@ -0,0 +1,51 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, initializedcheck=False
+"""
+Compiled (Cython) versions of the hot grid helpers in utils.
+Same behaviour as utils.is_walkable / get_neighbors / manhattan, but grid must be a
+C-contiguous GRID_DTYPE (uint8) array, as create_grid returns.
+Build in place with: cythonize -i utils_native.pyx
+utils only routes such grids here and falls back to its pure-Python versions otherwise
+(or when this extension is not built).
+"""
+
+# Cell types and directions; must match utils
+cdef enum:
+    OBSTACLE = 1
+    ROBOT = 2
+
+cdef int[4] DY = [-1, 1, 0, 0]
+cdef int[4] DX = [0, 0, -1, 1]
+
+
+def is_walkable(const unsigned char[:, ::1] grid, Py_ssize_t row, Py_ssize_t col, bint ignore_robot=False):
+    """True if cell can be moved into (empty, task, or robot if ignore_robot)."""
+    if not (0 <= row < grid.shape[0] and 0 <= col < grid.shape[1]):
+        return False
+    cdef unsigned char v = grid[row, col]
+    if v == OBSTACLE:
+        return False
+    if v == ROBOT and not ignore_robot:
+        return False
+    return True
+
+
+def get_neighbors(const unsigned char[:, ::1] grid, Py_ssize_t row, Py_ssize_t col, bint walkable_only=True):
+    """Return neighboring (row, col) cells. If walkable_only, exclude obstacles."""
+    cdef Py_ssize_t rows = grid.shape[0], cols = grid.shape[1], r, c
+    cdef int d
+    out = []
+    for d in range(4):
+        r = row + DY[d]
+        c = col + DX[d]
+        if not (0 <= r < rows and 0 <= c < cols):
+            continue
+        if walkable_only and grid[r, c] == OBSTACLE:
+            continue
+        out.append((r, c))
+    return out
+
+
+def manhattan(a, b):
+    """Manhattan distance between (r1,c1) and (r2,c2); a and b can be any indexable pair."""
+    cdef Py_ssize_t r1 = a[0], c1 = a[1], r2 = b[0], c2 = b[1]
+    return abs(r1 - r2) + abs(c1 - c2)
@@ -0,0 +1,53 @@
+"""
+Numba-compiled grid helpers for pathfinding inner loops.
+Same semantics as is_valid_cell / is_walkable / get_neighbors / manhattan in utils,
+but on plain ints and arrays so they inline into @njit search kernels.
+Requires numba (optional dependency); import only after checking it is installed.
+"""
+import numpy as np
+from numba import njit
+
+from utils import DIRECTIONS, OBSTACLE, ROBOT
+
+_DY = np.array([dy for dy, _ in DIRECTIONS], dtype=np.int32)
+_DX = np.array([dx for _, dx in DIRECTIONS], dtype=np.int32)
+
+
+@njit(cache=True, inline="always")
+def is_valid_cell_nb(rows, cols, row, col):
+    """True if (row, col) is within a rows x cols grid."""
+    return 0 <= row < rows and 0 <= col < cols
+
+
+@njit(cache=True, inline="always")
+def is_walkable_nb(grid, row, col, ignore_robot):
+    """True if cell can be moved into (empty, task, or robot if ignore_robot)."""
+    rows, cols = grid.shape
+    if not is_valid_cell_nb(rows, cols, row, col):
+        return False
+    v = grid[row, col]
+    return v != OBSTACLE and (ignore_robot or v != ROBOT)
+
+
+@njit(cache=True, inline="always")
+def get_neighbors_nb(grid, row, col, out):
+    """
+    Write the in-bounds, non-obstacle neighbours of (row, col) into out (int32[4, 2]),
+    in DIRECTIONS order, and return how many were written.
+    """
+    rows, cols = grid.shape
+    count = 0
+    for d in range(4):
+        r = row + _DY[d]
+        c = col + _DX[d]
+        if is_valid_cell_nb(rows, cols, r, c) and grid[r, c] != OBSTACLE:
+            out[count, 0] = r
+            out[count, 1] = c
+            count += 1
+    return count
+
+
+@njit(cache=True, inline="always")
+def manhattan_nb(r1, c1, r2, c2):
+    """Manhattan distance between (r1, c1) and (r2, c2)."""
+    return abs(r1 - r2) + abs(c1 - c2)